@@ -1,35 +1,60 @@
 # app.py
 import streamlit as st
-import plotly.express as px
-import plotly.graph_objects as go
 from datetime import datetime
-from pathlib import Path
-import json
-import PyPDF2
 import io
+import hashlib
+import logging
 from typing import Dict, Any
-from src.report_analyzer import CSRDReportAnalyzer, load_csrd_documents, get_regulatory_context
+from src.report_analyzer import CSRDReportAnalyzer, PAGE_SEPARATOR
+from src.config import UI_CONFIG
+
+logger = logging.getLogger(__name__)
 
 # Configuration de la page
 st.set_page_config(
-    page_title="Is it Bullshit? - Analyseur CSRD/DPEF",
-    page_icon="🔍",
-    layout="wide",
+    page_title=UI_CONFIG["page_title"],
+    page_icon=UI_CONFIG["page_icon"],
+    layout=UI_CONFIG["layout"],
     initial_sidebar_state="expanded"
 )
 
+# Sections d'analyse : (clé technique, nom d'affichage)
+SECTIONS = (
+    ("environmental", "Environnement"),
+    ("social", "Social"),
+    ("governance", "Gouvernance")
+)
+SECTION_LABELS = [label for _, label in SECTIONS]
+
 def extract_text_from_pdf(pdf_file):
     """Extrait le texte d'un fichier PDF."""
-    text = ""
+    import pymupdf
+    
     try:
-        pdf_reader = PyPDF2.PdfReader(pdf_file)
-        for page in pdf_reader.pages:
-            text += page.extract_text()
-        return text
+        pages = []
+        with pymupdf.open(stream=pdf_file.getvalue(), filetype="pdf") as doc:
+            for i in range(doc.page_count):
+                page = doc.load_page(i)
+                # Pas de police : page scannée ou graphique, aucun texte à extraire
+                if not page.get_fonts():
+                    continue
+                # Les blocs de type 1 sont des images
+                blocks = page.get_text("blocks")
+                pages.append("\n".join(block[4] for block in blocks if block[6] == 0))
+        # Pages séparées pour que l'analyseur reconnaisse en-têtes et pieds de page
+        return PAGE_SEPARATOR.join(pages)
     except Exception as e:
         st.error(f"Erreur lors de l'extraction du PDF: {str(e)}")
         return None
 
+def get_pdf_text(uploaded_file):
+    """Retourne le texte du PDF, en ne le ré-extrayant que si le fichier a changé."""
+    digest = hashlib.sha256(uploaded_file.getvalue()).digest()
+    if st.session_state.get('pdf_digest') != digest:
+        st.session_state.pdf_text = extract_text_from_pdf(uploaded_file)
+        st.session_state.pdf_digest = digest
+    return st.session_state.pdf_text
+
 def get_company_context(company_name: str) -> Dict[str, str]:
     """Récupère le contexte de l'entreprise."""
     return {
@@ -58,31 +83,24 @@ def generate_detailed_report(analysis_results: Dict[str, Any], company_info: Dic
         pdf.cell(0, 10, f"Date: {datetime.now().strftime('%d/%m/%Y')}", 0, 1)
         
         # Sections d'analyse
-        sections = ["environmental", "social", "governance"]
-        section_names = {
-            "environmental": "Environnement",
-            "social": "Social",
-            "governance": "Gouvernance"
-        }
-        
-        for section in sections:
+        for section, section_name in SECTIONS:
             data = analysis_results["analysis"][section]
             
             pdf.ln(5)
             pdf.set_font('Arial', 'B', 12)
-            pdf.cell(0, 10, section_names[section], 0, 1)
+            pdf.cell(0, 10, section_name, 0, 1)
             
             pdf.set_font('Arial', '', 11)
             pdf.cell(0, 10, f"Score: {data['score']:.1f}/100", 0, 1)
             pdf.multi_cell(0, 10, data['evaluation'])
             
             pdf.cell(0, 10, "Points forts:", 0, 1)
-            for point in data['points_forts']:
-                pdf.multi_cell(0, 10, "- " + point)
+            if data['points_forts']:
+                pdf.multi_cell(0, 10, "\n".join("- " + point for point in data['points_forts']))
             
             pdf.cell(0, 10, "Axes d'amelioration:", 0, 1)
-            for point in data['axes_amelioration']:
-                pdf.multi_cell(0, 10, "- " + point)
+            if data['axes_amelioration']:
+                pdf.multi_cell(0, 10, "\n".join("- " + point for point in data['axes_amelioration']))
         
         # Conformité réglementaire
         pdf.ln(10)
@@ -94,8 +112,9 @@ def generate_detailed_report(analysis_results: Dict[str, Any], company_info: Dic
         
         if analysis_results['conformite']['non_conformites']:
             pdf.cell(0, 10, "Points de non-conformité:", 0, 1)
-            for point in analysis_results['conformite']['non_conformites']:
-                pdf.multi_cell(0, 10, "- " + point)
+            pdf.multi_cell(0, 10, "\n".join(
+                "- " + point for point in analysis_results['conformite']['non_conformites']
+            ))
         
         # Créer le buffer en mémoire
         pdf_buffer = io.BytesIO()
@@ -114,18 +133,10 @@ def display_csrd_analysis(analysis_results: Dict[str, Any]):
              f"{analysis_results['conformite']['score_global']:.1f}/100",
              delta=None)
     
-    # Création d'un mapping entre les noms techniques et les noms d'affichage
-    section_names = {
-        "environmental": "Environnement",
-        "social": "Social",
-        "governance": "Gouvernance"
-    }
-    
     # Onglets par section
-    tab_names = list(section_names.values())
-    tabs = st.tabs(tab_names)
+    tabs = st.tabs(SECTION_LABELS)
     
-    for tab, (section_key, section_name) in zip(tabs, section_names.items()):
+    for tab, (section_key, section_name) in zip(tabs, SECTIONS):
         with tab:
             try:
                 data = analysis_results["analysis"][section_key]
@@ -159,7 +170,7 @@ def display_csrd_analysis(analysis_results: Dict[str, Any]):
             
             except KeyError as e:
                 st.error(f"Erreur: Données manquantes pour la section {section_name}")
-                st.write(f"Détail de l'erreur: {str(e)}")
+                logger.debug("Clé manquante dans les résultats de la section %s: %s", section_key, e)
     
     # Conformité réglementaire
     st.markdown("---")
@@ -175,15 +186,27 @@ def display_csrd_analysis(analysis_results: Dict[str, Any]):
     else:
         st.success("Aucun point de non-conformité identifié.")
 
+@st.cache_resource
+def get_analyzer() -> CSRDReportAnalyzer:
+    """Retourne l'analyseur partagé entre les reruns et les sessions."""
+    return CSRDReportAnalyzer()
+
 def main():
     """Fonction principale de l'application."""
     # Initialisation de l'analyseur
-    if 'analyzer' not in st.session_state:
-        try:
-            st.session_state.analyzer = CSRDReportAnalyzer()
-        except Exception as e:
-            st.error(f"Erreur d'initialisation: {str(e)}")
-            return
+    try:
+        analyzer = get_analyzer()
+    except Exception as e:
+        st.error(f"Erreur d'initialisation: {str(e)}")
+        return
+    
+    # Signalé à chaque exécution : les documents chargés sont partagés par toutes les sessions
+    if analyzer.document_errors:
+        st.error(
+            f"{len(analyzer.document_errors)} document(s) ESRS illisible(s): "
+            + ", ".join(analyzer.document_errors[:5])
+            + (", ..." if len(analyzer.document_errors) > 5 else "")
+        )
 
     # Sidebar 
     with st.sidebar:
@@ -248,12 +271,12 @@ def main():
                 if st.button("🔍 Lancer l'analyse CSRD", use_container_width=True):
                     with st.spinner("Analyse CSRD en cours..."):
                         # Extraction du texte du PDF
-                        text = extract_text_from_pdf(uploaded_file)
+                        text = get_pdf_text(uploaded_file)
                         
                         if text:
                             try:
                                 # Lancer l'analyse
-                                analysis_results = st.session_state.analyzer.analyze_report(
+                                analysis_results = analyzer.analyze_report(
                                     text=text,
                                     company_info=company_info
                                 )
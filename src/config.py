@@ -8,7 +8,7 @@ GPT_MODELS = {
     "gpt-4o-mini": {
         "name": "GPT-4o-mini",
         "model": "gpt-4o-mini",
-        "max_tokens": 150000,
+        "max_tokens": 4000,
         "temperature": 0.7
     }
 }
@@ -63,6 +63,8 @@ SCORING_CRITERIA = [
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 REGULATORY_DOCS_PATH = os.path.join(BASE_DIR, 'data', 'regulatory')
 REPORTS_PATH = os.path.join(BASE_DIR, 'data', 'reports')
+PAPPERS_CACHE_PATH = os.path.join(BASE_DIR, 'data', 'pappers_cache')
+ANALYSIS_CACHE_PATH = os.path.join(BASE_DIR, 'data', 'analysis_cache')
 
 # Configuration de la base de données
 DB_PATH = os.path.join(BASE_DIR, 'data', 'reports_analysis.db')
@@ -72,7 +74,8 @@ API_CONFIG = {
     "pappers": {
         "base_url": "https://api.pappers.fr/v2",
         "timeout": 30,
-        "retry_attempts": 3
+        "retry_attempts": 3,
+        "cache_ttl": 24 * 3600
     }
 }
 
@@ -1,4 +1,5 @@
 import streamlit as st
+import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 
@@ -10,12 +11,13 @@ class Dashboard:
             st.error(f"Erreur d'initialisation Dashboard: {str(e)}")
     
     def create_score_radar(self, scores):
-        categories = list(scores.keys())
-        values = list(scores.values())
+        # Accepte un dict ou une pd.Series déjà construite
+        if not isinstance(scores, pd.Series):
+            scores = pd.Series(scores, dtype=float)
         
         fig = go.Figure(data=go.Scatterpolar(
-            r=values,
-            theta=categories,
+            r=scores.to_numpy(),
+            theta=scores.index,
             fill='toself'
         ))
         
@@ -40,9 +42,9 @@ class Dashboard:
         return fig
 
     def create_sector_comparison(self, company_score, sector_scores):
-        fig = go.Figure(data=[
-            go.Bar(name='Entreprise', x=['Score'], y=[company_score]),
-            go.Bar(name='Moyenne secteur', x=['Score'], y=[sector_scores['mean']]),
-            go.Bar(name='Meilleur score secteur', x=['Score'], y=[sector_scores['max']])
-        ])
+        df = pd.DataFrame({
+            'Type': ['Entreprise', 'Moyenne secteur', 'Meilleur score secteur'],
+            'Score': [company_score, sector_scores['mean'], sector_scores['max']]
+        })
+        fig = px.bar(df, x='Type', y='Score', color='Type')
         return fig
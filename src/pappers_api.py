@@ -1,16 +1,145 @@
-import requests
+import httpx
+import asyncio
 import os
+import orjson
+import re
+import time
+from collections import OrderedDict
+from src.config import API_CONFIG, PAPPERS_CACHE_PATH
+
+MAX_CONCURRENT_REQUESTS = 20
+
+# Nombre de réponses conservées en mémoire, les moins récemment utilisées étant évincées
+MEMORY_CACHE_SIZE = 1024
+
+# Un SIREN compte exactement 9 chiffres ; il sert aussi de nom de fichier du cache
+SIREN_PATTERN = re.compile(r"\d{9}")
+
+def normalize_siren(siren):
+    """Retourne le SIREN en chaîne sans espaces : 123456789 et " 123 456 789" partagent le même cache."""
+    return "".join(str(siren).split())
 
 class PappersAPI:
-    def __init__(self, api_key):
+    def __init__(self, api_key, cache_dir=PAPPERS_CACHE_PATH):
         self.api_key = api_key
-        self.base_url = "https://api.pappers.fr/v2"
-    
-    def get_company_info(self, siren):
-        endpoint = f"{self.base_url}/entreprise"
-        params = {
+        self.base_url = API_CONFIG["pappers"]["base_url"]
+        self.cache_dir = cache_dir
+        self.cache_ttl = API_CONFIG["pappers"]["cache_ttl"]
+        # Connexions HTTP/2 réutilisées d'un appel synchrone à l'autre
+        self.client = httpx.Client(
+            http2=True,
+            timeout=API_CONFIG["pappers"]["timeout"],
+            limits=httpx.Limits(max_connections=MAX_CONCURRENT_REQUESTS)
+        )
+        # Réponses réussies seulement, avec leur date : siren -> (timestamp, données)
+        self._memory = OrderedDict()
+
+    def _cache_file(self, siren):
+        return os.path.join(self.cache_dir, f"{siren}.json")
+
+    def _read_cache(self, siren):
+        """Retourne la réponse en cache, en mémoire puis sur disque, si elle a moins de cache_ttl secondes."""
+        entry = self._memory.get(siren)
+        if entry is not None and time.time() - entry[0] <= self.cache_ttl:
+            self._memory.move_to_end(siren)
+            return entry[1]
+        return self._read_disk_cache(siren)
+
+    def _remember(self, siren, timestamp, data):
+        """Mémorise une réponse, en évinçant les plus anciennes au-delà de MEMORY_CACHE_SIZE."""
+        self._memory[siren] = (timestamp, data)
+        self._memory.move_to_end(siren)
+        while len(self._memory) > MEMORY_CACHE_SIZE:
+            self._memory.popitem(last=False)
+
+    def _read_disk_cache(self, siren):
+        """Retourne la réponse en cache si elle a moins de cache_ttl secondes."""
+        path = self._cache_file(siren)
+        try:
+            mtime = os.path.getmtime(path)
+            if time.time() - mtime > self.cache_ttl:
+                return None
+            with open(path, 'rb') as f:
+                data = orjson.loads(f.read())
+        except (OSError, ValueError):
+            return None
+        self._remember(siren, mtime, data)
+        return data
+
+    def _write_disk_cache(self, siren, data):
+        self._remember(siren, time.time(), data)
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with open(self._cache_file(siren), 'wb') as f:
+                f.write(orjson.dumps(data))
+        except (OSError, orjson.JSONEncodeError):
+            pass
+
+    def _company_request(self, siren):
+        """Retourne l'URL et les paramètres de la requête d'une entreprise."""
+        return f"{self.base_url}/entreprise", {
             "api_token": self.api_key,
             "siren": siren,
         }
-        response = requests.get(endpoint, params=params)
-        return response.json() if response.status_code == 200 else None
+
+    def _store_response(self, siren, response):
+        """Décode une réponse réussie et la met en cache ; None en cas d'échec."""
+        if response.status_code != 200:
+            return None
+        try:
+            data = response.json()
+        except ValueError:
+            return None
+        self._write_disk_cache(siren, data)
+        return data
+
+    def get_company_info(self, siren):
+        siren = normalize_siren(siren)
+        if not SIREN_PATTERN.fullmatch(siren):
+            return None
+        cached = self._read_cache(siren)
+        if cached is not None:
+            return cached
+
+        endpoint, params = self._company_request(siren)
+        try:
+            response = self.client.get(endpoint, params=params)
+        except httpx.HTTPError:
+            return None
+        return self._store_response(siren, response)
+
+    async def get_company_info_async(self, siren, client):
+        siren = normalize_siren(siren)
+        if not SIREN_PATTERN.fullmatch(siren):
+            return None
+        cached = self._read_cache(siren)
+        if cached is not None:
+            return cached
+
+        endpoint, params = self._company_request(siren)
+        try:
+            response = await client.get(endpoint, params=params)
+        except httpx.HTTPError:
+            return None
+        return self._store_response(siren, response)
+
+    async def get_many(self, sirens):
+        """
+        Récupère les informations de plusieurs entreprises en parallèle.
+        Comme get_company_info, retourne None pour chaque entreprise en échec.
+        """
+        limits = httpx.Limits(max_connections=MAX_CONCURRENT_REQUESTS)
+        async with httpx.AsyncClient(
+            http2=True,
+            timeout=API_CONFIG["pappers"]["timeout"],
+            limits=limits
+        ) as client:
+            results = await asyncio.gather(
+                *(self.get_company_info_async(siren, client) for siren in sirens),
+                return_exceptions=True
+            )
+        return [None if isinstance(result, Exception) else result for result in results]
+
+    def get_companies_info(self, sirens):
+        """Version synchrone de get_many, utilisable depuis Streamlit."""
+        return asyncio.run(self.get_many(sirens))
@@ -1,72 +1,150 @@
 # report_analyzer.py
 import streamlit as st
-from openai import OpenAI
-from typing import Dict, Any, List, Optional
+from openai import AsyncOpenAI
+from typing import Annotated, Dict, Any, List, Optional, Tuple
 from pathlib import Path
-import json
+import asyncio
+import hashlib
+import httpx
+import logging
+import msgspec
+import orjson
+import os
+import re
+import threading
+import zlib
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from itertools import chain
+from collections import Counter, OrderedDict
+from functools import lru_cache
+import time
+from src.config import ANALYSIS_CACHE_PATH
 
-@st.cache_data
-def load_csrd_documents() -> Optional[Dict[str, Dict[str, str]]]:
+logger = logging.getLogger(__name__)
+
+# Nombre de tentatives du client OpenAI sur les erreurs transitoires (429, 5xx, timeouts)
+OPENAI_MAX_RETRIES = 4
+
+# Pool de connexions HTTP/2 partagé par tous les appels à l'API
+OPENAI_MAX_CONNECTIONS = 32
+OPENAI_TIMEOUT = 60.0
+
+# Complétions simultanées, toutes sessions confondues : limite les rafales de 429
+# qui épuiseraient les tentatives sur les gros rapports découpés en morceaux
+MAX_CONCURRENT_COMPLETIONS = 16
+
+def _start_event_loop() -> asyncio.AbstractEventLoop:
+    """
+    Démarre une boucle asyncio dédiée dans un thread de fond.
+    Le client asynchrone reste ainsi attaché à une seule boucle d'un rerun à l'autre.
+    """
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+    return loop
+
+async def _create_semaphore(value: int) -> asyncio.Semaphore:
+    """Crée un sémaphore depuis la boucle d'événements qui l'exécute."""
+    return asyncio.Semaphore(value)
+
+# Catégorie des documents ESRS selon le préfixe de leur nom, reconnu en un seul match
+DOCUMENT_PREFIX_PATTERN = re.compile(r"ESRS_[ESG]|ESRS\d|ANNEXE")
+DOCUMENT_CATEGORIES = {
+    "ESRS_E": "environmental",
+    "ESRS_S": "social",
+    "ESRS_G": "governance",
+    "ANNEXE": "annexes"
+}
+PRECISION_DOCUMENTS = frozenset({"Questions_réponses", "precisions_esrs"})
+
+def _document_category(name: str) -> Optional[str]:
+    """Retourne la catégorie d'un document ESRS d'après son nom, ou None."""
+    if match := DOCUMENT_PREFIX_PATTERN.match(name):
+        # ESRS1, ESRS2... : normes transversales
+        return DOCUMENT_CATEGORIES.get(match.group(), "cross_cutting")
+    if name in PRECISION_DOCUMENTS:
+        return "precisions"
+    return None
+
+def _read_text_file(file_path: Path):
+    """Lit un fichier texte, en renvoyant l'exception plutôt qu'en la levant."""
+    try:
+        return file_path.read_text(encoding='utf-8')
+    except Exception as e:
+        return e
+
+@st.cache_resource
+def load_csrd_documents() -> Tuple[Dict[str, Dict[str, str]], List[str]]:
     """
     Charge les documents CSRD/ESRS depuis le système de fichiers.
+    Le résultat est partagé entre toutes les sessions et ne doit pas être modifié.
+    Les erreurs de lecture sont renvoyées plutôt qu'affichées : un message émis ici
+    ne serait visible qu'au premier chargement.
     Returns:
-        Dict[str, Dict[str, str]]: Documents CSRD organisés par catégorie
+        Tuple: Documents CSRD organisés par catégorie, noms des fichiers illisibles
     """
-    try:
-        base_path = Path("data/csrd")
-        csrd_data = {
-            "environmental": {},  # ESRS E1-E5
-            "social": {},        # ESRS S1-S4
-            "governance": {},    # ESRS G1
-            "cross_cutting": {}, # ESRS 1-2
-            "annexes": {},       # Documents annexes
-            "precisions": {}     # Précisions et Q&A
-        }
+    base_path = Path("data/csrd")
+    csrd_data = {
+        "environmental": {},  # ESRS E1-E5
+        "social": {},        # ESRS S1-S4
+        "governance": {},    # ESRS G1
+        "cross_cutting": {}, # ESRS 1-2
+        "annexes": {},       # Documents annexes
+        "precisions": {}     # Précisions et Q&A
+    }
+    read_errors = []
+    
+    # Catégoriser les fichiers selon leur préfixe, puis lire en parallèle
+    # les seuls fichiers retenus
+    general_path = base_path / "general"
+    if general_path.exists():
+        # Un seul parcours du dossier : nom et chemin de chaque fichier, triés par nom
+        # pour que les documents, et donc les prompts, ne dépendent pas du système de fichiers
+        with os.scandir(general_path) as it:
+            entries = sorted(
+                (entry for entry in it if entry.name.endswith(".txt") and entry.is_file()),
+                key=lambda entry: entry.name
+            )
         
-        # Parcourir tous les fichiers du dossier general
-        general_path = base_path / "general"
-        if general_path.exists():
-            for file_path in general_path.glob("*.txt"):
-                try:
-                    with open(file_path, 'r', encoding='utf-8') as f:
-                        content = f.read()
-                        name = file_path.stem
-                        
-                        # Catégoriser les fichiers selon leur préfixe
-                        if name.startswith("ESRS_E"):
-                            csrd_data["environmental"][name] = content
-                        elif name.startswith("ESRS_S"):
-                            csrd_data["social"][name] = content
-                        elif name.startswith("ESRS_G"):
-                            csrd_data["governance"][name] = content
-                        elif name.startswith("ESRS") and name[4].isdigit():
-                            csrd_data["cross_cutting"][name] = content
-                        elif name.startswith("ANNEXE"):
-                            csrd_data["annexes"][name] = content
-                        elif name in ["Questions_réponses", "precisions_esrs"]:
-                            csrd_data["precisions"][name] = content
-                except Exception as e:
-                    st.error(f"Erreur lors de la lecture de {file_path}: {str(e)}")
+        documents = [
+            (Path(entry.path), category)
+            for entry in entries
+            if (category := _document_category(entry.name[:-len(".txt")]))
+        ]
+        with ThreadPoolExecutor(max_workers=16) as executor:
+            contents = executor.map(_read_text_file, (file_path for file_path, _ in documents))
+            
+            for (file_path, category), content in zip(documents, contents):
+                if isinstance(content, Exception):
+                    logger.error("Erreur lors de la lecture de %s: %s", file_path, content)
+                    read_errors.append(file_path.name)
                     continue
-        
-        return csrd_data
-
-    except Exception as e:
-        st.error(f"Erreur lors du chargement des documents ESRS: {str(e)}")
-        return None
+                csrd_data[category][file_path.stem] = content
+    
+    return csrd_data, read_errors
 
-def get_regulatory_context(csrd_data: Dict[str, Dict[str, str]], section: str) -> str:
+def get_regulatory_context(csrd_data: Dict[str, Dict[str, str]], section: str,
+                           max_chars: Optional[int] = None) -> str:
     """
     Récupère le contexte réglementaire pour une section donnée.
     Args:
         csrd_data (Dict): Documents CSRD
         section (str): Section à analyser
+        max_chars (int, optional): Longueur maximale du contexte renvoyé. Le contexte est
+            alors limité aux standards propres à la section, chacun recevant une part égale
     Returns:
         str: Contexte réglementaire concaténé
     """
     if not csrd_data:
         return ""
+    
+    separator = "\n\n---\n\n"
+    topical_docs = list(csrd_data.get(section, {}).values())
+    if max_chars is not None and topical_docs:
+        # Part de chaque document une fois les séparateurs déduits, jamais négative : une
+        # borne négative garderait presque tout le document
+        share = max(0, (max_chars - (len(topical_docs) - 1) * len(separator)) // len(topical_docs))
+        return separator.join(doc[:share] for doc in topical_docs)[:max_chars]
         
     relevant_docs = []
     
@@ -75,58 +153,310 @@ def get_regulatory_context(csrd_data: Dict[str, Dict[str, str]], section: str) -
         relevant_docs.extend(csrd_data["cross_cutting"].values())
     
     # Ajouter les documents spécifiques à la section
-    if section in csrd_data:
-        relevant_docs.extend(csrd_data[section].values())
+    relevant_docs.extend(topical_docs)
     
     # Ajouter les précisions pertinentes
     if "precisions" in csrd_data:
         relevant_docs.extend(csrd_data["precisions"].values())
-        
-    return "\n\n---\n\n".join(relevant_docs)
+    
+    if max_chars is None:
+        return separator.join(relevant_docs)
+    
+    # Section sans standard propre : ne joindre que les premiers documents nécessaires
+    needed_docs = []
+    total_len = 0
+    for doc in relevant_docs:
+        needed_docs.append(doc)
+        total_len += len(doc) + len(separator)
+        if total_len >= max_chars:
+            break
+    return separator.join(needed_docs)[:max_chars]
+
+class Compliance(msgspec.Struct):
+    """Conformité d'une section aux standards ESRS."""
+    conforming: List[str] = []
+    non_conforming: List[str] = []
+    partially_conforming: List[str] = []
+
+class StandardAnalysis(msgspec.Struct):
+    """Analyse d'une section au regard d'un standard ESRS."""
+    standard: Annotated[str, msgspec.Meta(description="Identifiant du standard, par exemple ESRS E1")] = ""
+    score: Annotated[float, msgspec.Meta(description="Score du standard (0-100)")] = 0
+    conformity: Annotated[str, msgspec.Meta(description="Niveau de conformité au standard")] = ""
+    findings: List[str] = []
+    evidence: List[str] = []
+
+class SectionResult(msgspec.Struct):
+    """Résultat de l'analyse d'une section, tel que renvoyé par le modèle."""
+    score: Annotated[float, msgspec.Meta(description="Score global (0-100)")] = 0
+    evaluation: Annotated[str, msgspec.Meta(description="Évaluation générale")] = ""
+    standards_analysis: List[StandardAnalysis] = []
+    compliance: Compliance = msgspec.field(default_factory=Compliance)
+    recommendations: List[str] = []
+
+def strict_schema(schema: Any) -> Any:
+    """
+    Adapte un schéma msgspec au mode strict des sorties structurées : toutes les
+    propriétés sont requises, aucune autre n'est admise et les valeurs par défaut,
+    non supportées, sont retirées.
+    """
+    if isinstance(schema, list):
+        return [strict_schema(item) for item in schema]
+    if not isinstance(schema, dict):
+        return schema
+    strict = {
+        key: ({name: strict_schema(item) for name, item in value.items()}
+              if key in ("properties", "$defs") else strict_schema(value))
+        for key, value in schema.items()
+        if key != "default"
+    }
+    if "properties" in strict:
+        strict["required"] = list(strict["properties"])
+        strict["additionalProperties"] = False
+    return strict
+
+# Schéma JSON des résultats, transmis à l'API en sortie structurée stricte : la réponse
+# est garantie conforme et le format n'a pas à être répété dans les prompts
+_, SCHEMA_COMPONENTS = msgspec.json.schema_components([SectionResult], ref_template="#/$defs/{name}")
+SCHEMA_COMPONENTS = strict_schema(SCHEMA_COMPONENTS)
+SECTION_RESULT_SCHEMA = {**SCHEMA_COMPONENTS["SectionResult"], "$defs": SCHEMA_COMPONENTS}
+
+def json_schema_format(name: str, schema: Dict[str, Any]) -> Dict[str, Any]:
+    """Paramètre response_format pour une sortie structurée selon un schéma strict."""
+    return {
+        "type": "json_schema",
+        "json_schema": {"name": name, "schema": schema, "strict": True}
+    }
+
+SECTION_RESPONSE_FORMAT = json_schema_format("section_analysis", SECTION_RESULT_SCHEMA)
+
+@lru_cache(maxsize=16)
+def batched_response_format(sections: Tuple[str, ...]) -> Dict[str, Any]:
+    """Paramètre response_format d'une réponse groupée : un résultat par section."""
+    return json_schema_format("esrs_analysis", strict_schema({
+        "type": "object",
+        "properties": {section: {"$ref": "#/$defs/SectionResult"} for section in sections},
+        "$defs": SCHEMA_COMPONENTS
+    }))
+
+# Longueurs maximales des extraits insérés dans les prompts
+REGULATORY_CONTEXT_CHARS = 2000
+REPORT_TEXT_CHARS = 8000
+
+# Un prompt système d'une seule section est plus court que le prompt groupé : il reçoit
+# un contexte plus long pour dépasser le seuil du cache de prompts
+SECTION_CONTEXT_CHARS = 6000
+
+# OpenAI ne met en cache que les préfixes d'au moins 1024 tokens. À 4,5 caractères par
+# token au plus pour les textes ESRS, un prompt système plus court n'en profiterait pas
+MIN_CACHED_PREFIX_CHARS = 1024 * 9 // 2
+
+# Au-delà de REPORT_TEXT_CHARS, le rapport est découpé en morceaux analysés en parallèle
+REPORT_CHUNK_CHARS = 6000
+MAX_REPORT_CHUNKS = 16
+
+# Passé REPORT_CHUNK_MIN_CHARS, un morceau s'arrête après une ligne dont l'empreinte est
+# multiple de CHUNK_BOUNDARY_MODULUS : une version révisée du rapport retrouve les mêmes
+# morceaux, et leurs résultats en cache, hors des passages modifiés
+REPORT_CHUNK_MIN_CHARS = 4500
+CHUNK_BOUNDARY_MODULUS = 4
+
+# Paramètres de génération : sorties analytiques, courtes et peu variables
+ANALYSIS_TEMPERATURE = 0.2
+SECTION_MAX_TOKENS = 1500
+# Plafond de sortie de gpt-4o-mini : une réponse groupée ne peut pas demander davantage
+MODEL_MAX_OUTPUT_TOKENS = 16384
+
+# API Batch : intervalle de consultation et statuts terminaux d'un lot
+BATCH_POLL_INTERVAL = 30
+BATCH_FINAL_STATUSES = frozenset({"completed", "failed", "expired", "cancelled"})
+
+# Nombre de résultats de section conservés pour les réanalyses à l'identique
+SECTION_CACHE_SIZE = 256
+
+# Durée de validité des résultats de section conservés sur disque
+ANALYSIS_CACHE_TTL = 7 * 24 * 3600
+
+# Au-delà de cette taille, les sections sont analysées par des appels séparés
+MAX_BATCHED_PROMPT_CHARS = 30000
+
+def content_digest(text: str, company_json: str) -> bytes:
+    """Empreinte d'un texte analysé pour une entreprise donnée."""
+    return hashlib.blake2b(f"{company_json}\0{text}".encode(), digest_size=16).digest()
+
+def split_text(text: str, max_chars: int, min_chars: Optional[int] = None) -> List[str]:
+    """
+    Découpe un texte en morceaux d'au plus max_chars caractères, en coupant aux fins de ligne.
+    Seules les lignes plus longues que max_chars sont coupées en leur milieu.
+    Avec min_chars, les coupures dépendent du contenu : passé min_chars, un morceau se
+    termine après toute ligne désignée comme frontière par son empreinte.
+    """
+    chunks = []
+    current = []
+    current_len = 0
+    for line in text.splitlines(keepends=True):
+        for start in range(0, len(line), max_chars):
+            piece = line[start:start + max_chars]
+            if current and current_len + len(piece) > max_chars:
+                chunks.append("".join(current))
+                current = []
+                current_len = 0
+            current.append(piece)
+            current_len += len(piece)
+        if (min_chars is not None and current_len >= min_chars
+                and zlib.crc32(line.encode()) % CHUNK_BOUNDARY_MODULUS == 0):
+            chunks.append("".join(current))
+            current = []
+            current_len = 0
+    if current:
+        chunks.append("".join(current))
+    return chunks
+
+# Séparateur de pages du texte extrait, et première ou dernière ligne d'au moins autant
+# de pages au-delà duquel une ligne courte est un en-tête ou un pied de page
+PAGE_SEPARATOR = "\f"
+BOILERPLATE_LINE_CHARS = 80
+BOILERPLATE_MIN_PAGES = 2
+
+# Termes signalant un passage utile à l'analyse ESRS, pour choisir les morceaux à garder
+ESRS_KEYWORD_PATTERN = re.compile(
+    r"\bESRS\b|\bCSRD\b|\bGES\b|scope\s*[123]|émission|climat|énergi|pollution|\beau\b|"
+    r"biodiversit|déchet|circulai|salarié|effectif|sécurité|formation|diversit|"
+    r"communaut|consommat|gouvernance|éthique|corruption|fournisseur|objectif|indicateur",
+    re.IGNORECASE
+)
+
+def clean_report_text(text: str) -> str:
+    """
+    Normalise les espaces et retire les lignes vides, ainsi que les en-têtes et pieds de
+    page : lignes courtes identiques en tête ou en fin de plusieurs pages. Seules ces
+    positions sont nettoyées, une ligne répétée ailleurs dans une page est conservée.
+    Les pages sont séparées par PAGE_SEPARATOR ; sans séparateur, seuls les espaces
+    sont normalisés.
+    """
+    pages = []
+    for page in text.split(PAGE_SEPARATOR):
+        lines = [" ".join(line.split()) for line in page.splitlines()]
+        pages.append([line for line in lines if line])
+    
+    edge_counts = Counter(
+        line
+        for lines in pages if lines
+        for line in {lines[0], lines[-1]}
+        if len(line) <= BOILERPLATE_LINE_CHARS
+    )
+    boilerplate = {line for line, count in edge_counts.items() if count >= BOILERPLATE_MIN_PAGES}
+    
+    cleaned = []
+    for lines in pages:
+        if lines and lines[0] in boilerplate:
+            lines = lines[1:]
+        if lines and lines[-1] in boilerplate:
+            lines = lines[:-1]
+        cleaned.extend(lines)
+    return "\n".join(cleaned)
+
+def report_chunks(text: str) -> Tuple[List[str], int]:
+    """
+    Découpe un rapport long en au plus MAX_REPORT_CHUNKS morceaux. Au-delà, les morceaux
+    citant le plus de termes ESRS sont conservés, dans l'ordre du rapport.
+    Returns:
+        Tuple: Morceaux conservés, et nombre de morceaux écartés
+    """
+    chunks = split_text(text, REPORT_CHUNK_CHARS, REPORT_CHUNK_MIN_CHARS)
+    if len(chunks) <= MAX_REPORT_CHUNKS:
+        return chunks, 0
+    dropped = len(chunks) - MAX_REPORT_CHUNKS
+    logger.warning(
+        "Rapport trop long : %d morceaux sur %d écartés de l'analyse",
+        dropped, len(chunks)
+    )
+    ranked = sorted(range(len(chunks)), key=lambda i: len(ESRS_KEYWORD_PATTERN.findall(chunks[i])), reverse=True)
+    return [chunks[i] for i in sorted(ranked[:MAX_REPORT_CHUNKS])], dropped
+
+def complete_sections(chunk_results: List[List[Any]], sections: List[str]) -> Tuple[List[bool], int]:
+    """
+    Vérifie la couverture des résultats par morceau d'un rapport.
+    Args:
+        chunk_results (List): Pour chaque morceau, résultats par section ou exception levée
+    Returns:
+        Tuple: Pour chaque section, si tous ses morceaux ont été analysés, et nombre de
+            morceaux dont au moins une section a échoué
+    """
+    complete = [
+        all(isinstance(results[k], SectionResult) for results in chunk_results)
+        for k in range(len(sections))
+    ]
+    chunks_failed = sum(
+        1 for results in chunk_results
+        if not all(isinstance(section_results, SectionResult) for section_results in results)
+    )
+    return complete, chunks_failed
+
+# Structure d'évaluation ESRS
+EVALUATION_CRITERIA = {
+    "environmental": {
+        "climate": ["ESRS E1"],
+        "pollution": ["ESRS E2"],
+        "water": ["ESRS E3"],
+        "biodiversity": ["ESRS E4"],
+        "circular_economy": ["ESRS E5"]
+    },
+    "social": {
+        "workforce": ["ESRS S1"],
+        "communities": ["ESRS S2"],
+        "affected_people": ["ESRS S3"],
+        "consumers": ["ESRS S4"]
+    },
+    "governance": {
+        "business_conduct": ["ESRS G1"]
+    }
+}
+
+# Les critères ne changent pas : sérialisés une seule fois, au chargement du module
+CRITERIA_JSON = {
+    section: orjson.dumps(criteria, option=orjson.OPT_SORT_KEYS).decode()
+    for section, criteria in EVALUATION_CRITERIA.items()
+}
+
+def create_report_prompt(text: str, company_json: str) -> str:
+    """
+    Crée la partie variable du prompt : entreprise et texte du rapport.
+    Elle est placée en fin de requête pour que le préfixe fixe profite du cache de prompts.
+    """
+    return f"""CONTEXTE ENTREPRISE:
+{company_json}
+
+TEXTE À ANALYSER:
+{text}"""
+
+def consolidation_system_prompt(section: str) -> str:
+    """Crée le prompt système de consolidation des analyses partielles d'une section."""
+    return f"""Tu es un expert en analyse ESRS, spécialisé dans la section {section}.
+Consolider en une analyse unique, selon les normes ESRS, les analyses partielles de la section {section} réalisées sur des extraits successifs d'un même rapport."""
 
 class SectionAnalyzer:
     """Classe utilitaire pour l'analyse d'une section spécifique."""
     
-    def __init__(self, section: str, evaluation_criteria: Dict[str, Any]):
+    def __init__(self, section: str, criteria_json: Dict[str, str], regulatory_context: str):
         self.section = section
-        self.criteria = evaluation_criteria[section]
+        self.criteria_json = criteria_json[section]
+        self.system_prompt = self.create_system_prompt(regulatory_context)
     
-    def create_analysis_prompt(self, text: str, company_info: Dict[str, Any], 
-                             regulatory_context: str) -> str:
-        """Crée le prompt pour l'analyse d'une section."""
-        return f"""Analyser la section {self.section} selon les normes ESRS.
-
-CONTEXTE ENTREPRISE:
-{json.dumps(company_info, indent=2)}
+    def create_system_prompt(self, regulatory_context: str) -> str:
+        """Crée la partie fixe du prompt d'une section (contexte déjà tronqué)."""
+        return f"""Tu es un expert en analyse ESRS, spécialisé dans la section {self.section}.
+Analyser la section {self.section} du rapport fourni selon les normes ESRS.
 
 RÉFÉRENTIEL ESRS APPLICABLE:
-{regulatory_context[:2000]}
+{regulatory_context}
 
 CRITÈRES D'ÉVALUATION:
-{json.dumps(self.criteria, indent=2)}
-
-TEXTE À ANALYSER:
-{text[:8000]}
-
-FORMAT DE RÉPONSE (JSON):
-{{
-    "score": float,  # Score global (0-100)
-    "evaluation": string,  # Évaluation générale
-    "standards_analysis": {{  # Analyse par standard ESRS
-        "standard_id": {{
-            "score": float,
-            "conformity": string,
-            "findings": [string],
-            "evidence": [string]
-        }}
-    }},
-    "compliance": {{
-        "conforming": [string],
-        "non_conforming": [string],
-        "partially_conforming": [string]
-    }},
-    "recommendations": [string]
-}}"""
+{self.criteria_json}"""
+    
+    def create_analysis_prompt(self, text: str, company_json: str) -> str:
+        """Crée la partie variable du prompt pour l'analyse d'une section (texte déjà tronqué)."""
+        return create_report_prompt(text, company_json)
 
 class CSRDReportAnalyzer:
     """Analyseur de rapports CSRD avec évaluation détaillée."""
@@ -138,32 +468,86 @@ class CSRDReportAnalyzer:
                 st.error("Clé API manquante dans les secrets Streamlit")
                 raise ValueError("Clé API manquante")
             
-            self.client = OpenAI(api_key=st.secrets["OPENAI_API_KEY"])
             self.model = "gpt-4o-mini"  # Modèle le plus récent avec JSON mode
-            self.csrd_data = load_csrd_documents()
+            self.csrd_data, self.document_errors = load_csrd_documents()
             
             # Structure d'évaluation ESRS
-            self.evaluation_criteria = {
-                "environmental": {
-                    "climate": ["ESRS E1"],
-                    "pollution": ["ESRS E2"],
-                    "water": ["ESRS E3"],
-                    "biodiversity": ["ESRS E4"],
-                    "circular_economy": ["ESRS E5"]
-                },
-                "social": {
-                    "workforce": ["ESRS S1"],
-                    "communities": ["ESRS S2"],
-                    "affected_people": ["ESRS S3"],
-                    "consumers": ["ESRS S4"]
-                },
-                "governance": {
-                    "business_conduct": ["ESRS G1"]
-                }
-            }
+            self.evaluation_criteria = EVALUATION_CRITERIA
+            self._criteria_json = CRITERIA_JSON
             
-            if not self.csrd_data:
+            if not any(self.csrd_data.values()):
                 raise ValueError("Impossible de charger les documents CSRD")
+            
+            # Le contexte réglementaire ne dépend que de la section : tronqué une seule fois,
+            # court pour le prompt groupé et plus long pour les prompts d'une seule section
+            # Les sections dont le contexte est identique partagent la même chaîne
+            shared_contexts = {}
+            self._section_contexts = {}
+            analyzer_contexts = {}
+            for section in self.evaluation_criteria:
+                context = get_regulatory_context(self.csrd_data, section, REGULATORY_CONTEXT_CHARS)
+                self._section_contexts[section] = shared_contexts.setdefault(context, context)
+                context = get_regulatory_context(self.csrd_data, section, SECTION_CONTEXT_CHARS)
+                analyzer_contexts[section] = shared_contexts.setdefault(context, context)
+            
+            # Un analyseur par section, qui porte la partie fixe de son prompt
+            self._analyzers = {
+                section: SectionAnalyzer(section, self._criteria_json, context)
+                for section, context in analyzer_contexts.items()
+            }
+            self._batched_system_prompts = {}
+            for section, analyzer in self._analyzers.items():
+                if len(analyzer.system_prompt) < MIN_CACHED_PREFIX_CHARS:
+                    logger.warning(
+                        "Prompt système de la section %s trop court pour le cache de prompts (%d caractères)",
+                        section, len(analyzer.system_prompt)
+                    )
+            
+            # Résultats par (empreinte du texte et de l'entreprise, section), manipulés
+            # uniquement depuis la boucle d'événements de l'analyseur
+            self._section_cache = OrderedDict()
+            
+            # Les résultats conservés sur disque ne valent que pour ces modèles, ces prompts,
+            # ces paramètres de génération, ce schéma de réponse, et ces règles de nettoyage
+            # et de découpage du texte
+            self._cache_dir = Path(ANALYSIS_CACHE_PATH)
+            self._cache_version = hashlib.blake2b(
+                "\0".join(
+                    [self.model, orjson.dumps(SECTION_RESULT_SCHEMA).decode()]
+                    + [analyzer.system_prompt for analyzer in self._analyzers.values()]
+                    + [consolidation_system_prompt(section) for section in self._analyzers]
+                    + [self._batched_system_prompt(list(self._analyzers))]
+                    + [str(param) for param in (
+                        ANALYSIS_TEMPERATURE, SECTION_MAX_TOKENS, MODEL_MAX_OUTPUT_TOKENS,
+                        MAX_BATCHED_PROMPT_CHARS, PAGE_SEPARATOR, BOILERPLATE_LINE_CHARS,
+                        BOILERPLATE_MIN_PAGES, REPORT_TEXT_CHARS, REPORT_CHUNK_CHARS,
+                        MAX_REPORT_CHUNKS, REPORT_CHUNK_MIN_CHARS, CHUNK_BOUNDARY_MODULUS,
+                        ESRS_KEYWORD_PATTERN.pattern
+                    )]
+                ).encode(),
+                digest_size=8
+            ).digest()
+            self._prune_analysis_cache()
+            
+            # Démarrés en dernier, une fois les documents validés : un échec de l'initialisation,
+            # retentée à chaque rerun, ne laisse ni thread ni pool de connexions derrière lui
+            self.client = AsyncOpenAI(
+                api_key=st.secrets["OPENAI_API_KEY"],
+                max_retries=OPENAI_MAX_RETRIES,
+                http_client=httpx.AsyncClient(
+                    http2=True,
+                    limits=httpx.Limits(
+                        max_connections=OPENAI_MAX_CONNECTIONS,
+                        max_keepalive_connections=OPENAI_MAX_CONNECTIONS
+                    ),
+                    timeout=OPENAI_TIMEOUT
+                )
+            )
+            self._loop = _start_event_loop()
+            # Le sémaphore est créé sur la boucle qui l'utilisera
+            self._completion_slots = asyncio.run_coroutine_threadsafe(
+                _create_semaphore(MAX_CONCURRENT_COMPLETIONS), self._loop
+            ).result()
                 
         except Exception as e:
             raise Exception(f"Erreur d'initialisation: {str(e)}")
@@ -177,121 +561,634 @@ class CSRDReportAnalyzer:
         Returns:
             Dict: Résultats de l'analyse
         """
-        if not text:
-            raise ValueError("Le texte du rapport est vide")
+        return self._run_analysis([(text, company_info)], self._analyze_texts)[0]
+
+    def analyze_reports(self, reports: List[Tuple[str, Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        """
+        Analyse plusieurs rapports en temps réel, leurs appels à l'API se chevauchant.
+        La concurrence reste bornée par MAX_CONCURRENT_COMPLETIONS pour l'ensemble des rapports.
+        Args:
+            reports (List): Couples (texte du rapport, informations sur l'entreprise)
+        Returns:
+            List: Résultats de l'analyse de chaque rapport, dans l'ordre reçu
+        """
+        return self._run_analysis(reports, self._analyze_texts)
+
+    def batch_analyze_reports(self, reports: List[Tuple[str, Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        """
+        Analyse un lot de rapports via l'API Batch d'OpenAI, à coût réduit.
+        Destiné aux traitements non interactifs : l'appel bloque jusqu'à la fin du lot (24h au plus).
+        Args:
+            reports (List): Couples (texte du rapport, informations sur l'entreprise)
+        Returns:
+            List: Résultats de l'analyse de chaque rapport, dans l'ordre du lot
+        """
+        return self._run_analysis(reports, self._batch_analyze)
+
+    def _prepare_reports(self, reports: List[Tuple[str, Dict[str, Any]]]) -> Tuple[List[str], List[str]]:
+        """
+        Valide et prépare les rapports à analyser.
+        Returns:
+            Tuple: Textes nettoyés et informations sur l'entreprise sérialisées, par rapport
+        """
+        texts, company_jsons = [], []
+        for text, company_info in reports:
+            logger.debug("Analyse du rapport de %s (%d caractères)", company_info.get("name"), len(text or ""))
+            
+            # Nettoyé une seule fois : moins de jetons et des morceaux plus denses
+            text = clean_report_text(text or "")
+            if not text:
+                raise ValueError("Le texte du rapport est vide")
+            texts.append(text)
             
+            # Sérialisé une seule fois pour tous les prompts du rapport, en JSON compact à clés
+            # triées : moins de jetons, et une même entreprise donne toujours la même empreinte
+            company_jsons.append(orjson.dumps(company_info, option=orjson.OPT_SORT_KEYS).decode())
+        return texts, company_jsons
+
+    def _run_analysis(self, reports: List[Tuple[str, Dict[str, Any]]], analyze) -> List[Dict[str, Any]]:
+        """
+        Prépare les rapports, les analyse sur la boucle de l'analyseur et construit leurs résultats.
+        Args:
+            reports (List): Couples (texte du rapport, informations sur l'entreprise)
+            analyze: Coroutine d'analyse, _analyze_texts ou _batch_analyze
+        Returns:
+            List: Résultats de l'analyse de chaque rapport, dans l'ordre reçu
+        """
+        texts, company_jsons = self._prepare_reports(reports)
+        
         try:
-            # Structure de base des résultats
-            analysis_results = {
-                "analysis": {},
-                "conformite": {
-                    "score_global": 0,
-                    "evaluation": "",
-                    "non_conformites": []
-                },
-                "recommendations": []
-            }
+            # Analyse par section ESRS, les appels à l'API sont lancés en parallèle
+            sections = list(self._analyzers)
+            all_results = asyncio.run_coroutine_threadsafe(
+                analyze(texts, company_jsons, sections),
+                self._loop
+            ).result()
             
-            # Analyse par section ESRS
-            sections = ["environmental", "social", "governance"]
-            total_score = 0
+            return [
+                self._build_analysis_results(
+                    dict(zip(sections, report_results)), company_info, chunks_dropped, chunks_failed
+                )
+                for (report_results, chunks_dropped, chunks_failed), (_, company_info)
+                in zip(all_results, reports)
+            ]
             
+        except Exception as e:
+            logger.exception("Échec de l'analyse du rapport")
+            raise Exception(f"Échec de l'analyse: {str(e)}")
+
+    def _build_analysis_results(self, all_results: Dict[str, Any], company_info: Dict[str, Any],
+                                chunks_dropped: int = 0, chunks_failed: int = 0) -> Dict[str, Any]:
+        """
+        Construit les résultats de l'analyse d'un rapport à partir des résultats par section.
+        Args:
+            all_results (Dict): Résultat de chaque section, ou l'exception levée pour cette section
+            company_info (Dict): Informations sur l'entreprise
+            chunks_dropped (int): Nombre de morceaux du rapport écartés faute de place
+            chunks_failed (int): Nombre de morceaux dont l'analyse a échoué pour une section au moins
+        Returns:
+            Dict: Résultats de l'analyse
+        """
+        section_results = {}
+        failed_sections = set()
+        for section, results in all_results.items():
+            if isinstance(results, Exception):
+                st.error(f"Erreur lors de l'analyse de la section {section}: {str(results)}")
+                results = self._empty_section_result(section)
+                failed_sections.add(section)
+            section_results[section] = results
+        
+        if chunks_dropped:
+            st.warning(
+                f"Rapport trop long : {chunks_dropped} extrait(s) citant le moins les normes ESRS "
+                f"n'ont pas été analysés"
+            )
+        if chunks_failed:
+            st.warning(
+                f"Analyse incomplète : {chunks_failed} extrait(s) n'ont pas pu être analysés pour "
+                f"toutes les sections, les résultats concernés portent sur le reste du rapport"
+            )
+        
+        analysis_results = {
+            "analysis": {
+                section: {
+                    "score": results.score,
+                    "evaluation": results.evaluation,
+                    "points_forts": results.compliance.conforming,
+                    "axes_amelioration": results.compliance.non_conforming
+                }
+                for section, results in section_results.items()
+            },
+            "conformite": {
+                "score_global": 0,
+                "evaluation": "",
+                "non_conformites": list(chain.from_iterable(
+                    results.compliance.non_conforming for results in section_results.values()
+                ))
+            },
+            "recommendations": list(chain.from_iterable(
+                results.recommendations for results in section_results.values()
+            ))
+        }
+        # Calcul du score global, sur les seules sections effectivement analysées
+        analyzed_scores = [
+            results.score for section, results in section_results.items()
+            if section not in failed_sections
+        ]
+        analysis_results["conformite"]["score_global"] = (
+            round(sum(analyzed_scores) / len(analyzed_scores), 1) if analyzed_scores else 0
+        )
+        analysis_results["conformite"]["evaluation"] = (
+            f"Score global de conformité: {analysis_results['conformite']['score_global']}/100. "
+            f"{len(analysis_results['conformite']['non_conformites'])} non-conformités identifiées."
+        )
+
+        # Ajout des métadonnées
+        analysis_results["metadata"] = {
+            "company_info": company_info,
+            "analysis_date": datetime.now().isoformat(),
+            "version_csrd": "2024",
+            "score_global": analysis_results["conformite"]["score_global"],
+            "chunks_dropped": chunks_dropped,
+            "chunks_failed": chunks_failed
+        }
+
+        return analysis_results
+
+    async def _analyze_texts(self, texts: List[str], company_jsons: List[str],
+                             sections: List[str]) -> List[Tuple[List[Any], int, int]]:
+        """Analyse plusieurs rapports en parallèle sur la boucle de l'analyseur."""
+        return await asyncio.gather(
+            *(self._analyze_text(text, sections, company_json)
+              for text, company_json in zip(texts, company_jsons))
+        )
+
+    async def _batch_analyze(self, texts: List[str], company_jsons: List[str],
+                             sections: List[str]) -> List[Tuple[List[Any], int, int]]:
+        """
+        Soumet une requête par (morceau, section) absent du cache dans un seul lot, puis
+        consolide les morceaux de tous les rapports avec des appels ordinaires parallèles.
+        Les rapports et morceaux identiques, pour une même entreprise, ne sont traités qu'une fois.
+        Returns:
+            List: Pour chaque rapport, résultats par section ou exception levée pour cette
+                section, nombre de morceaux écartés et nombre de morceaux en échec
+        """
+        chunks_per_report, dropped_per_report = [], []
+        for text in texts:
+            chunks, dropped = report_chunks(text) if len(text) > REPORT_TEXT_CHARS else ([text], 0)
+            chunks_per_report.append(chunks)
+            dropped_per_report.append(dropped)
+        
+        # Un rapport identique à un précédent en reprend les résultats
+        report_digests = [content_digest(text, company_json) for text, company_json in zip(texts, company_jsons)]
+        first_reports = {}
+        for i, digest in enumerate(report_digests):
+            first_reports.setdefault(digest, i)
+        
+        # Résultats déjà en cache sous l'empreinte du texte complet, comme pour _analyze_text
+        all_results = [None] * len(texts)
+        cached_reports = await asyncio.gather(
+            *(self._cached_section_results(digest, sections) for digest in first_reports)
+        )
+        pending_reports = []
+        for i, cached in zip(first_reports.values(), cached_reports):
+            if all(cached):
+                all_results[i] = cached
+            else:
+                pending_reports.append(i)
+        
+        # Empreinte de chaque morceau ; un morceau présent dans plusieurs rapports n'est
+        # analysé qu'une fois
+        chunk_digests = {
+            i: [content_digest(chunk, company_jsons[i]) for chunk in chunks_per_report[i]]
+            for i in pending_reports
+        }
+        chunk_texts = {}
+        for i in pending_reports:
+            for digest, chunk in zip(chunk_digests[i], chunks_per_report[i]):
+                chunk_texts.setdefault(digest, (chunk, company_jsons[i]))
+        
+        # Seuls les morceaux et sections absents du cache sont soumis au lot
+        cached_chunks = await asyncio.gather(
+            *(self._cached_section_results(digest, sections) for digest in chunk_texts)
+        )
+        section_results_by_chunk = {}
+        lines = []
+        for k, ((digest, (chunk, company_json)), cached) in enumerate(zip(chunk_texts.items(), cached_chunks)):
+            prompt = create_report_prompt(chunk, company_json)
+            for section, section_results in zip(sections, cached):
+                if section_results is not None:
+                    section_results_by_chunk[(digest, section)] = section_results
+                    continue
+                lines.append(msgspec.json.encode({
+                    "custom_id": f"{k}:{section}",
+                    "method": "POST",
+                    "url": "/v1/chat/completions",
+                    "body": self._completion_params(
+                        system_prompt=self._analyzers[section].system_prompt,
+                        prompt=prompt,
+                        response_format=SECTION_RESPONSE_FORMAT
+                    )
+                }))
+        
+        outputs = await self._run_batch(b"\n".join(lines)) if lines else {}
+        
+        new_results = []
+        for k, digest in enumerate(chunk_texts):
             for section in sections:
-                section_results = self._analyze_section(
-                    text=text,
-                    section=section,
-                    company_info=company_info
+                if (digest, section) in section_results_by_chunk:
+                    continue
+                section_results = outputs.get(
+                    f"{k}:{section}", ValueError(f"Aucune réponse du lot pour la section {section}")
                 )
-                
-                # Ajouter les résultats de la section
-                analysis_results["analysis"][section] = {
-                    "score": section_results.get("score", 0),
-                    "evaluation": section_results.get("evaluation", ""),
-                    "points_forts": section_results["compliance"].get("conforming", []),
-                    "axes_amelioration": section_results["compliance"].get("non_conforming", [])
-                }
-                
-                # Mise à jour du score global et des non-conformités
-                total_score += section_results.get("score", 0)
-                analysis_results["conformite"]["non_conformites"].extend(
-                    section_results["compliance"].get("non_conforming", [])
+                section_results_by_chunk[(digest, section)] = section_results
+                if isinstance(section_results, SectionResult):
+                    new_results.append(((digest, section), section_results))
+        await asyncio.gather(*(self._cache_section_result(key, results) for key, results in new_results))
+        
+        chunk_results = {
+            i: [
+                [section_results_by_chunk[(digest, section)] for section in sections]
+                for digest in chunk_digests[i]
+            ]
+            for i in pending_reports
+        }
+        
+        # Consolidation de tous les rapports en une seule vague d'appels
+        consolidated = await asyncio.gather(
+            *(self._consolidate_section(section, [results[k] for results in chunk_results[i]], company_jsons[i])
+              for i in pending_reports for k, section in enumerate(sections)),
+            return_exceptions=True
+        )
+        failed_per_report = [0] * len(texts)
+        consolidated_results = []
+        for n, i in enumerate(pending_reports):
+            all_results[i] = consolidated[n * len(sections):(n + 1) * len(sections)]
+            # Un rapport court a la même empreinte que son unique morceau, déjà mis en cache ;
+            # une section consolidée sans tous ses morceaux n'est pas mise en cache
+            if len(chunks_per_report[i]) > 1:
+                complete, failed_per_report[i] = complete_sections(chunk_results[i], sections)
+                consolidated_results.extend(
+                    ((report_digests[i], section), section_results)
+                    for section, section_results, is_complete in zip(sections, all_results[i], complete)
+                    if is_complete and isinstance(section_results, SectionResult)
                 )
-                
-                # Ajouter les recommandations
-                if "recommendations" in section_results:
-                    analysis_results["recommendations"].extend(section_results["recommendations"])
-            
-            # Calcul du score global
-            analysis_results["conformite"]["score_global"] = round(total_score / len(sections), 1)
-            analysis_results["conformite"]["evaluation"] = (
-                f"Score global de conformité: {analysis_results['conformite']['score_global']}/100. "
-                f"{len(analysis_results['conformite']['non_conformites'])} non-conformités identifiées."
+        await asyncio.gather(
+            *(self._cache_section_result(key, results) for key, results in consolidated_results)
+        )
+        
+        for i, digest in enumerate(report_digests):
+            first = first_reports[digest]
+            all_results[i] = all_results[first]
+            failed_per_report[i] = failed_per_report[first]
+        return list(zip(all_results, dropped_per_report, failed_per_report))
+
+    async def _run_batch(self, jsonl: bytes) -> Dict[str, Any]:
+        """
+        Exécute un lot de requêtes et attend sa fin.
+        Returns:
+            Dict: Résultat décodé, ou exception portant l'erreur de la requête, indexé par custom_id
+        """
+        batch_file = await self.client.files.create(file=("analyses.jsonl", jsonl), purpose="batch")
+        batch = await self.client.batches.create(
+            input_file_id=batch_file.id,
+            endpoint="/v1/chat/completions",
+            completion_window="24h"
+        )
+        while batch.status not in BATCH_FINAL_STATUSES:
+            await asyncio.sleep(BATCH_POLL_INTERVAL)
+            batch = await self.client.batches.retrieve(batch.id)
+        
+        if batch.status != "completed" or not (batch.output_file_id or batch.error_file_id):
+            raise RuntimeError(f"Le lot {batch.id} s'est terminé avec le statut {batch.status}")
+        
+        # Les requêtes en échec sont listées dans un fichier d'erreurs distinct
+        outputs = {}
+        for file_id in (batch.output_file_id, batch.error_file_id):
+            if not file_id:
+                continue
+            content = await self.client.files.content(file_id)
+            for line in content.text.splitlines():
+                item = orjson.loads(line)
+                try:
+                    outputs[item["custom_id"]] = self._decode_batch_item(item)
+                except Exception as e:
+                    outputs[item["custom_id"]] = e
+        return outputs
+
+    @staticmethod
+    def _decode_batch_item(item: Dict[str, Any]) -> SectionResult:
+        """Décode le résultat d'une requête du lot, ou lève l'erreur qu'elle a reçue."""
+        response = item.get("response") or {}
+        body = response.get("body") or {}
+        if item.get("error") or response.get("status_code") != 200:
+            error = item.get("error") or body.get("error") or {}
+            message = error.get("message", error) if isinstance(error, dict) else error
+            raise ValueError(
+                f"Requête {item['custom_id']} en erreur ({response.get('status_code')}): {message}"
             )
+        message = body["choices"][0]["message"]["content"]
+        return msgspec.json.decode(message, type=SectionResult, strict=False)
 
-            # Ajout des métadonnées
-            analysis_results["metadata"] = {
-                "company_info": company_info,
-                "analysis_date": datetime.now().isoformat(),
-                "version_csrd": "2024",
-                "score_global": analysis_results["conformite"]["score_global"]
-            }
+    async def _analyze_text(self, text: str, sections: List[str],
+                            company_json: str) -> Tuple[List[Any], int, int]:
+        """
+        Analyse le texte complet du rapport.
+        Un texte long est découpé en morceaux analysés en parallèle, puis les résultats
+        partiels de chaque section sont consolidés par un dernier appel.
+        Returns:
+            Tuple: Résultats par section, ou l'exception levée pour cette section, nombre
+                de morceaux écartés et nombre de morceaux en échec
+        """
+        if len(text) <= REPORT_TEXT_CHARS:
+            return await self._analyze_sections(text, sections, company_json), 0, 0
+        
+        # Découpage peu coûteux, refait même en cas de cache pour connaître les morceaux écartés
+        chunks, chunks_dropped = report_chunks(text)
+        
+        # Les résultats consolidés sont mis en cache sous l'empreinte du texte complet
+        digest = content_digest(text, company_json)
+        cached = await self._cached_section_results(digest, sections)
+        if all(cached):
+            return cached, chunks_dropped, 0
+        
+        chunk_results = await asyncio.gather(
+            *(self._analyze_sections(chunk, sections, company_json) for chunk in chunks)
+        )
+        
+        results = await asyncio.gather(
+            *(self._consolidate_section(section, [results[i] for results in chunk_results], company_json)
+              for i, section in enumerate(sections)),
+            return_exceptions=True
+        )
+        
+        # Une section consolidée sans tous ses morceaux ne couvre qu'une partie du rapport :
+        # elle n'est pas mise en cache, pour être complétée à la prochaine analyse
+        complete, chunks_failed = complete_sections(chunk_results, sections)
+        await asyncio.gather(
+            *(self._cache_section_result((digest, section), section_results)
+              for section, section_results, is_complete in zip(sections, results, complete)
+              if is_complete and isinstance(section_results, SectionResult))
+        )
+        return results, chunks_dropped, chunks_failed
 
-            return analysis_results
+    async def _consolidate_section(self, section: str, partial_results: List[Any],
+                                   company_json: str) -> SectionResult:
+        """
+        Fusionne les analyses d'une section obtenues sur chaque morceau du rapport.
+        Args:
+            partial_results (List): Résultats par morceau, ou l'exception levée pour ce morceau
+        Returns:
+            SectionResult: Analyse consolidée de la section
+        """
+        valid_results = [result for result in partial_results if isinstance(result, SectionResult)]
+        if not valid_results:
+            raise partial_results[0]
+        if len(valid_results) == 1:
+            return valid_results[0]
+        
+        prompt = f"""CONTEXTE ENTREPRISE:
+{company_json}
+
+ANALYSES PARTIELLES:
+{msgspec.json.encode(valid_results).decode()}"""
+        
+        return await self._complete_json(
+            system_prompt=consolidation_system_prompt(section),
+            prompt=prompt,
+            response_type=SectionResult,
+            response_format=SECTION_RESPONSE_FORMAT
+        )
+
+    async def _analyze_sections(self, text: str, sections: List[str],
+                                company_json: str) -> List[Any]:
+        """
+        Analyse plusieurs sections, en une seule requête si le prompt le permet.
+        Les sections absentes de la réponse groupée sont analysées séparément, en parallèle.
+        Les sections déjà analysées pour le même texte et la même entreprise sont reprises du cache.
+        Returns:
+            List: Résultats par section, ou l'exception levée pour cette section
+        """
+        digest = content_digest(text, company_json)
+        cached = await self._cached_section_results(digest, sections)
+        results = {
+            section: section_results
+            for section, section_results in zip(sections, cached)
+            if section_results is not None
+        }
+        pending = [section for section in sections if section not in results]
+        if not pending:
+            return [results[section] for section in sections]
+        
+        new_results = {}
+        system_prompt = self._batched_system_prompt(pending)
+        prompt = create_report_prompt(text, company_json)
+        if len(pending) > 1 and len(system_prompt) + len(prompt) <= MAX_BATCHED_PROMPT_CHARS:
+            try:
+                new_results = await self._analyze_all_sections(system_prompt, prompt, pending)
+            except Exception:
+                new_results = {}
+        
+        missing = [section for section in pending if section not in new_results]
+        fallback_results = await asyncio.gather(
+            *(self._analyze_section(text, section, company_json) for section in missing),
+            return_exceptions=True
+        )
+        new_results.update(zip(missing, fallback_results))
+        
+        await asyncio.gather(
+            *(self._cache_section_result((digest, section), section_results)
+              for section, section_results in new_results.items()
+              if isinstance(section_results, SectionResult))
+        )
+        results.update(new_results)
+        
+        return [results[section] for section in sections]
+
+    async def _cached_section_results(self, digest: bytes, sections: List[str]) -> List[Optional[SectionResult]]:
+        """Retourne les résultats mémorisés de plusieurs sections d'un même texte, None pour les absents."""
+        return await asyncio.gather(
+            *(self._cached_section_result((digest, section)) for section in sections)
+        )
+
+    async def _cached_section_result(self, key: Tuple[bytes, str]) -> Optional[SectionResult]:
+        """Retourne le résultat mémorisé d'une section, en mémoire puis sur disque, ou None."""
+        section_results = self._section_cache.get(key)
+        if section_results is not None:
+            self._section_cache.move_to_end(key)
+            return section_results
+        
+        # Lecture du disque hors de la boucle d'événements, partagée par toutes les analyses
+        section_results = await asyncio.to_thread(self._read_cached_section, self._section_cache_file(key))
+        if section_results is not None:
+            self._remember_section_result(key, section_results)
+        return section_results
+
+    async def _cache_section_result(self, key: Tuple[bytes, str], section_results: SectionResult) -> None:
+        """Mémorise le résultat d'une section en mémoire et sur disque."""
+        self._remember_section_result(key, section_results)
+        await asyncio.to_thread(
+            self._write_cached_section, self._section_cache_file(key), msgspec.json.encode(section_results)
+        )
+
+    @staticmethod
+    def _read_cached_section(path: Path) -> Optional[SectionResult]:
+        """Lit un résultat de section sur disque, ou None s'il est absent, expiré ou illisible."""
+        try:
+            if time.time() - path.stat().st_mtime > ANALYSIS_CACHE_TTL:
+                return None
+            return msgspec.json.decode(path.read_bytes(), type=SectionResult)
+        except (OSError, msgspec.DecodeError):
+            return None
+
+    def _write_cached_section(self, path: Path, content: bytes) -> None:
+        try:
+            self._cache_dir.mkdir(parents=True, exist_ok=True)
+            path.write_bytes(content)
+        except OSError as e:
+            logger.warning("Impossible d'écrire le cache d'analyse: %s", e)
+
+    def _prune_analysis_cache(self) -> None:
+        """Supprime les résultats sur disque expirés ou d'une autre version de l'analyseur."""
+        prefix = f"{self._cache_version.hex()}_"
+        expiry = time.time() - ANALYSIS_CACHE_TTL
+        try:
+            entries = list(os.scandir(self._cache_dir))
+        except OSError:
+            return
+        for entry in entries:
+            try:
+                if not entry.name.startswith(prefix) or entry.stat().st_mtime < expiry:
+                    os.remove(entry.path)
+            except OSError as e:
+                logger.warning("Impossible de nettoyer le cache d'analyse: %s", e)
+
+    def _remember_section_result(self, key: Tuple[bytes, str], section_results: SectionResult) -> None:
+        """Mémorise le résultat d'une section, en évinçant les plus anciens au-delà de SECTION_CACHE_SIZE."""
+        self._section_cache[key] = section_results
+        self._section_cache.move_to_end(key)
+        while len(self._section_cache) > SECTION_CACHE_SIZE:
+            self._section_cache.popitem(last=False)
+
+    def _section_cache_file(self, key: Tuple[bytes, str]) -> Path:
+        digest, section = key
+        return self._cache_dir / f"{self._cache_version.hex()}_{digest.hex()}_{section}.json"
+
+    def _batched_system_prompt(self, sections: List[str]) -> str:
+        """Retourne la partie fixe du prompt groupé, construite une seule fois par liste de sections."""
+        key = tuple(sections)
+        if key not in self._batched_system_prompts:
+            section_blocks = []
+            for section in sections:
+                section_blocks.append(f"""SECTION {section}
+
+RÉFÉRENTIEL ESRS APPLICABLE:
+{self._section_contexts[section]}
+
+CRITÈRES D'ÉVALUATION:
+{self._criteria_json[section]}""")
             
-        except Exception as e:
-            st.error(f"Erreur détaillée de l'analyse: {str(e)}")
-            raise Exception(f"Échec de l'analyse: {str(e)}")
+            section_list = ", ".join(sections)
+            separator = "\n\n"
+            self._batched_system_prompts[key] = f"""Tu es un expert en analyse ESRS.
+Analyser les sections {section_list} du rapport fourni selon les normes ESRS.
+
+{separator.join(section_blocks)}
+
+Répondre par un objet JSON ayant pour clés {section_list}."""
+        return self._batched_system_prompts[key]
+
+    def _completion_params(self, system_prompt: str, prompt: str, response_format: Dict[str, Any],
+                           max_tokens: int = SECTION_MAX_TOKENS) -> Dict[str, Any]:
+        """Paramètres d'une requête de complétion, communs aux appels directs et aux lots."""
+        return {
+            "model": self.model,
+            "messages": [
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": prompt}
+            ],
+            "temperature": ANALYSIS_TEMPERATURE,
+            "max_tokens": max_tokens,
+            "response_format": response_format,
+            # Oriente les requêtes de même préfixe vers le même cache de prompt
+            "prompt_cache_key": hashlib.blake2b(system_prompt.encode(), digest_size=8).hexdigest()
+        }
+
+    async def _complete_json(self, system_prompt: str, prompt: str, response_type: Any,
+                             response_format: Dict[str, Any],
+                             max_tokens: int = SECTION_MAX_TOKENS) -> Any:
+        """
+        Envoie une requête en sortie structurée et décode la réponse reçue en streaming.
+        Args:
+            response_type: Type attendu, validé pendant le décodage
+            response_format: Schéma de sortie transmis à l'API
+            max_tokens: Nombre maximal de tokens générés
+        Returns:
+            Any: Réponse décodée
+        """
+        async with self._completion_slots:
+            stream = await self.client.chat.completions.create(
+                **self._completion_params(system_prompt, prompt, response_format, max_tokens),
+                stream=True
+            )
+            
+            parts = []
+            async for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    parts.append(chunk.choices[0].delta.content)
+        
+        return msgspec.json.decode("".join(parts), type=response_type, strict=False)
 
-    def _analyze_section(self, text: str, section: str, company_info: Dict[str, Any]) -> Dict[str, Any]:
+    async def _analyze_all_sections(self, system_prompt: str, prompt: str,
+                                    sections: List[str]) -> Dict[str, SectionResult]:
+        """
+        Analyse toutes les sections en un seul appel à l'API.
+        Returns:
+            Dict: Résultats valides indexés par section
+        """
+        results = await self._complete_json(
+            system_prompt=system_prompt,
+            prompt=prompt,
+            response_type=Dict[str, Any],
+            response_format=batched_response_format(tuple(sections)),
+            max_tokens=min(SECTION_MAX_TOKENS * len(sections), MODEL_MAX_OUTPUT_TOKENS)
+        )
+        
+        # Chaque section est validée séparément : une section invalide sera réanalysée seule
+        valid_results = {}
+        for section in sections:
+            if not results.get(section):
+                continue
+            try:
+                valid_results[section] = msgspec.convert(results[section], SectionResult, strict=False)
+            except msgspec.ValidationError:
+                continue
+        return valid_results
+
+    async def _analyze_section(self, text: str, section: str, company_json: str) -> SectionResult:
         """
         Analyse une section spécifique du rapport.
         Args:
             text (str): Texte du rapport
             section (str): Section à analyser
-            company_info (Dict): Informations sur l'entreprise
+            company_json (str): Informations sur l'entreprise, sérialisées en JSON
         Returns:
-            Dict: Résultats de l'analyse de la section
+            SectionResult: Résultats de l'analyse de la section
         """
-        try:
-            section_analyzer = SectionAnalyzer(section, self.evaluation_criteria)
-            regulatory_context = get_regulatory_context(self.csrd_data, section)
-            
-            prompt = section_analyzer.create_analysis_prompt(
-                text=text,
-                company_info=company_info,
-                regulatory_context=regulatory_context
-            )
+        section_analyzer = self._analyzers[section]
+        prompt = section_analyzer.create_analysis_prompt(
+            text=text,
+            company_json=company_json
+        )
 
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {
-                        "role": "system",
-                        "content": f"Tu es un expert en analyse ESRS, spécialisé dans la section {section}."
-                    },
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.7,
-                max_tokens=4000,
-                response_format={"type": "json_object"}
-            )
+        return await self._complete_json(
+            system_prompt=section_analyzer.system_prompt,
+            prompt=prompt,
+            response_type=SectionResult,
+            response_format=SECTION_RESPONSE_FORMAT
+        )
 
-            results = json.loads(response.choices[0].message.content)
-            if not results or not isinstance(results, dict):
-                raise ValueError(f"Réponse invalide pour la section {section}")
-                
-            return results
-
-        except Exception as e:
-            st.error(f"Erreur lors de l'analyse de la section {section}: {str(e)}")
-            return {
-                "score": 0,
-                "evaluation": f"Erreur d'analyse de la section {section}",
-                "standards_analysis": {},
-                "compliance": {
-                    "conforming": [],
-                    "non_conforming": [],
-                    "partially_conforming": []
-                },
-                "recommendations": []
-            }
+    @staticmethod
+    def _empty_section_result(section: str) -> SectionResult:
+        """Résultat par défaut d'une section dont l'analyse a échoué."""
+        return SectionResult(evaluation=f"Erreur d'analyse de la section {section}")